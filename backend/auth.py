@@ -1,10 +1,12 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import anyio
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from models import User
+from models import User, Driver, DriverBrief
 import os
 
 # Security
@@ -15,12 +17,33 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Driver profiles resolved in the last minute, by user id
+_driver_cache = TTLCache(maxsize=10_000, ttl=60)
+
+# Limits concurrent bcrypt work to the CPU count (created lazily inside the event loop)
+_hash_limiter: Optional[anyio.CapacityLimiter] = None
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Hash of the default password for admin-created accounts, computed once per process
+DEFAULT_PASSWORD_HASH = get_password_hash("password")
+
+def _get_hash_limiter():
+    global _hash_limiter
+    if _hash_limiter is None:
+        _hash_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+    return _hash_limiter
+
+async def verify_password_async(plain_password, hashed_password):
+    """Verify a password in a worker thread so bcrypt doesn't block the event loop"""
+    return await anyio.to_thread.run_sync(
+        verify_password, plain_password, hashed_password, limiter=_get_hash_limiter()
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -70,4 +93,17 @@ async def get_current_driver(current_user: User = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Driver access required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_driver_record(current_user: User = Depends(get_current_driver)):
+    """Driver profile (id and user_id) of the current user, cached so driver endpoints skip the lookup"""
+    driver = _driver_cache.get(current_user.id)
+    if driver is None:
+        driver = await Driver.find_one({"user_id": current_user.id}, projection_model=DriverBrief)
+        if driver is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Driver profile not found"
+            )
+        _driver_cache[current_user.id] = driver
+    return driver
\ No newline at end of file
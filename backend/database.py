@@ -4,8 +4,10 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from models import User, Driver, Passenger, Admin, Ride, KilometerEntry, FuelEntry, LeaveRequest, DriverAttendance, Vehicle
 from config import settings
+from auth import DEFAULT_PASSWORD_HASH
 import asyncio
 import ssl
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 
 # MongoDB client
 client: AsyncIOMotorClient = None
@@ -21,21 +23,33 @@ async def init_database():
     
     print(f"🔗 Connecting to MongoDB: {mongodb_url[:50]}...")
     
+    # Keep a pool of connections open so requests don't pay the handshake cost
+    pool_options = dict(
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+        connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    )
+    
     # Check if this is a local MongoDB connection (no SSL needed)
     is_local_mongodb = "localhost" in mongodb_url or "127.0.0.1" in mongodb_url
     
     if is_local_mongodb:
         # Local MongoDB - no SSL
         print("🔗 Connecting to local MongoDB...")
-        client = AsyncIOMotorClient(mongodb_url)
+        client = AsyncIOMotorClient(mongodb_url, **pool_options)
     else:
         # MongoDB Atlas - use SSL
         print("☁️ Connecting to MongoDB Atlas...")
         client = AsyncIOMotorClient(
             mongodb_url,
-            tlsCAFile=certifi.where()
+            tlsCAFile=certifi.where(),
+            **pool_options
         )
     
+    await _migrate_user_email_index(client["rideshare"]["users"])
+    
     # Initialize Beanie with the document models
     await init_beanie(
         database=client["rideshare"],
@@ -61,6 +75,35 @@ async def init_database():
         print(f"❌ MongoDB connection failed: {e}")
         raise
 
+async def _migrate_user_email_index(users):
+    """Drop the old non-unique email_1 index so init_beanie can create the unique one"""
+    email_index = (await users.index_information()).get("email_1")
+    if email_index is None or email_index.get("unique"):
+        return
+    
+    # The unique index can't be built while duplicate emails exist
+    duplicates = await users.aggregate([
+        {"$group": {"_id": "$email", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 10}
+    ]).to_list(length=None)
+    if duplicates:
+        emails = ", ".join(str(d["_id"]) for d in duplicates)
+        raise RuntimeError(f"Cannot enforce unique user emails, duplicates exist: {emails}")
+    
+    print("🔧 Replacing non-unique users.email_1 index with a unique one...")
+    try:
+        await users.drop_index("email_1")
+    except OperationFailure as e:
+        if e.code != 27:  # IndexNotFound: another worker dropped it first
+            raise
+
+async def warm_up_pool():
+    """Open pooled connections up front so the first requests don't pay for them"""
+    # Concurrent queries each check out their own connection from the pool
+    await asyncio.gather(*(User.find_one() for _ in range(settings.MONGODB_MIN_POOL_SIZE)))
+    print(f"✅ MongoDB connection pool warmed up ({settings.MONGODB_MIN_POOL_SIZE} connections)")
+
 async def close_database():
     """Close MongoDB connection"""
     global client
@@ -81,16 +124,14 @@ async def create_default_users():
             email="admin@rideshare.com",
             phone="+1234567890",
             role="admin",
-            password_hash="$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj4J/8KqjqKq"  # "password"
+            password_hash=DEFAULT_PASSWORD_HASH  # "password"
         )
-        await admin_user.insert()
         
         # Create admin profile
         admin_profile = Admin(
             user_id=admin_user.id,
             permissions='["view_all", "manage_drivers", "manage_rides"]'
         )
-        await admin_profile.insert()
         
         # Create sample driver
         driver_user = User(
@@ -98,9 +139,8 @@ async def create_default_users():
             email="driver@rideshare.com",
             phone="+1234567891",
             role="driver",
-            password_hash="$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj4J/8KqjqKq"  # "password"
+            password_hash=DEFAULT_PASSWORD_HASH  # "password"
         )
-        await driver_user.insert()
         
         driver_profile = Driver(
             user_id=driver_user.id,
@@ -115,7 +155,6 @@ async def create_default_users():
             total_rides=1250,
             current_km_reading=45230
         )
-        await driver_profile.insert()
         
         # Create sample passenger
         passenger_user = User(
@@ -123,16 +162,35 @@ async def create_default_users():
             email="passenger@rideshare.com",
             phone="+1234567892",
             role="passenger",
-            password_hash="$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj4J/8KqjqKq"  # "password"
+            password_hash=DEFAULT_PASSWORD_HASH  # "password"
         )
-        await passenger_user.insert()
         
         passenger_profile = Passenger(
             user_id=passenger_user.id,
             rating=4.9,
             total_rides=89
         )
-        await passenger_profile.insert()
+        
+        # The admin insert doubles as a seeding lock: with several workers starting
+        # on an empty database, only the one whose insert succeeds seeds the rest
+        try:
+            await admin_user.insert()
+        except DuplicateKeyError:
+            print("✅ Default users already exist")
+            return
+        
+        # Insert the remaining users in one batch, then the profiles (one per collection) concurrently
+        sample_accounts = [(driver_user, driver_profile), (passenger_user, passenger_profile)]
+        try:
+            await User.insert_many([user for user, _ in sample_accounts], ordered=False)
+            failed = set()
+        except BulkWriteError as e:
+            # Sample accounts whose email is already taken are left as they are
+            failed = {error["index"] for error in e.details["writeErrors"]}
+        await asyncio.gather(
+            admin_profile.insert(),
+            *(profile.insert() for i, (_, profile) in enumerate(sample_accounts) if i not in failed),
+        )
         
         print("✅ Default users created successfully")
     else:
@@ -1,25 +1,39 @@
 # Railway deployment entry point - Complete FastAPI app
+import asyncio
+import hashlib
+import logging
 import os
+import time
 import sys
+import zlib
 from pathlib import Path
 
 # Add the backend directory to Python path
 backend_path = Path(__file__).parent
 sys.path.insert(0, str(backend_path))
 
-from fastapi import FastAPI, Depends, HTTPException, status, Security
+from fastapi import FastAPI, Depends, HTTPException, status, Security, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
+from cachetools import TTLCache
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta, date as dt_date
+from operator import attrgetter
 from typing import Optional, List
 import uuid
 import json
+from contextlib import asynccontextmanager
 
 # Import backend modules
 try:
-    from database import init_database, create_default_users, close_database
+    from database import init_database, warm_up_pool, create_default_users, close_database
     from models import User, Driver, Passenger, Admin, Ride, KilometerEntry, FuelEntry, LeaveRequest, DriverAttendance, RideStatus, LeaveRequestStatus, Vehicle
+    from models import RideBrief, UserBrief, DriverBrief
+    from schemas import FuelEntryCreate, RidesWithDetailsResponse
     from config import settings
-    from auth import get_password_hash, verify_password, create_access_token, get_current_user, get_current_admin, get_current_driver
+    from auth import DEFAULT_PASSWORD_HASH, verify_password_async, create_access_token, get_current_user, get_current_admin, get_current_driver_record
 except ImportError as e:
     print(f"❌ Import error: {e}")
     print(f"🔍 Backend path: {backend_path}")
@@ -27,29 +41,56 @@ except ImportError as e:
     print(f"🔍 Files in backend: {list(backend_path.glob('*.py')) if backend_path.exists() else 'Directory not found'}")
     raise
 
+# Request-path logging goes through the logger so it can be silenced with LOG_LEVEL
+logging.basicConfig(level=settings.LOG_LEVEL.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("rideshare")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database once per worker process and close it on shutdown"""
+    await init_database()
+    await warm_up_pool()
+    await create_default_users()
+    logger.info("MongoDB Atlas connected and ready")
+    yield
+    await close_database()
+
 # Create FastAPI app
-app = FastAPI(title="RideShare API", version="1.0.0")
+app = FastAPI(title="RideShare API", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Add CORS middleware
+# Set ALLOWED_ORIGINS / ALLOWED_ORIGIN_REGEX in production instead of the "*" default
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure this properly for production
+    allow_origins=list(settings.ALLOWED_ORIGINS),
+    allow_origin_regex=settings.ALLOWED_ORIGIN_REGEX or None,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,  # Let browsers cache preflight responses for 24h
 )
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    await init_database()
-    await create_default_users()
-    print("✅ MongoDB Atlas connected and ready!")
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    await close_database()
+# Compress JSON responses (debug listings are large and highly repetitive)
+_GZIP_LEVEL = 5
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=_GZIP_LEVEL)
+
+async def _gzip_chunks(chunks):
+    """Gzip a byte stream, flushing after every chunk so it reaches the client right away"""
+    compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def _streaming_response(request: Request, chunks, media_type):
+    """Stream `chunks`, compressing them here since GZipMiddleware holds streamed bodies in its buffer"""
+    if "gzip" not in request.headers.get("accept-encoding", ""):
+        return StreamingResponse(chunks, media_type=media_type)
+    # A Content-Encoding header makes GZipMiddleware pass the response through untouched
+    return StreamingResponse(
+        _gzip_chunks(chunks),
+        media_type=media_type,
+        headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+    )
 
 # Test endpoint
 @app.get("/test")
@@ -63,7 +104,7 @@ async def mobile_test():
     return {
         "status": "success",
         "message": "Mobile app can reach the server!",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),
         "server": "RecTransport Backend"
     }
 
@@ -74,19 +115,150 @@ async def health_check():
     return {
         "status": "healthy",
         "message": "RecTransport API is running",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
 
+# Debug responses are served from memory for a few seconds, then refreshed in the
+# background for a while longer (stale-while-revalidate) before a caller has to wait
+_DEBUG_CACHE_TTL = 10
+_DEBUG_CACHE_STALE = 60
+_debug_cache = {}  # endpoint name -> (built_at, body, etag)
+_debug_refreshing = set()
+_debug_refresh_tasks = set()  # Strong references; the event loop only holds tasks weakly
+_SUCCESS_PREFIX = b'{"status":"success"'
+
+def _store_debug_body(key, body):
+    """Build a cache entry for `body`; error payloads are never cached"""
+    entry = (time.monotonic(), body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+    if body.startswith(_SUCCESS_PREFIX):
+        _debug_cache[key] = entry
+    return entry
+
+async def _refresh_debug_cache(key, endpoint):
+    """Rebuild one cached debug response in the background"""
+    try:
+        payload = await endpoint()
+        if isinstance(payload, dict):
+            body = orjson.dumps(payload)
+        else:
+            body = b"".join([chunk async for chunk in payload])
+        _store_debug_body(key, body)
+    except Exception:
+        logger.exception("Debug: background refresh of %s failed", key)
+    finally:
+        _debug_refreshing.discard(key)
+
+async def _stream_into_debug_cache(key, chunks):
+    """Pass a streamed body through to the client and cache it once it's complete"""
+    parts = []
+    async for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    _store_debug_body(key, b"".join(parts))
+
+async def _stream_debug_list(field, rows, with_total=False):
+    """Encode {"status": "success", field: [...]} one row at a time as rows arrive"""
+    count = 0
+    try:
+        async for row in rows:
+            yield (b"," if count else b'{"status":"success","%s":[' % field.encode()) + orjson.dumps(row)
+            count += 1
+    except Exception as e:
+        logger.exception("Debug: error streaming %s", field)
+        if count:
+            raise  # Part of the body is already sent, so the response can only be aborted
+        yield orjson.dumps({"status": "error", "message": str(e), field: []})
+        return
+    if not count:
+        yield b'{"status":"success","%s":[' % field.encode()
+    yield b"]" + (b',"total":%d' % count if with_total else b"") + b"}"
+
+def _cached_debug_response(endpoint):
+    """Cache a debug endpoint's JSON body and answer If-None-Match with 304"""
+    key = endpoint.__name__
+    
+    async def wrapper(request: Request):
+        entry = _debug_cache.get(key)
+        age = time.monotonic() - entry[0] if entry else None
+        if entry is None or age >= _DEBUG_CACHE_TTL + _DEBUG_CACHE_STALE:
+            payload = await endpoint()
+            if not isinstance(payload, dict):
+                # Large listings are streamed to the caller while the cache entry is built
+                return _streaming_response(request, _stream_into_debug_cache(key, payload), "application/json")
+            entry = _store_debug_body(key, orjson.dumps(payload))
+        elif age >= _DEBUG_CACHE_TTL and key not in _debug_refreshing:
+            _debug_refreshing.add(key)
+            task = asyncio.create_task(_refresh_debug_cache(key, endpoint))
+            _debug_refresh_tasks.add(task)
+            task.add_done_callback(_debug_refresh_tasks.discard)
+        
+        _, body, etag = entry
+        headers = {"ETag": etag, "Cache-Control": f"max-age={_DEBUG_CACHE_TTL}"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+    
+    wrapper.__name__ = endpoint.__name__
+    wrapper.__doc__ = endpoint.__doc__
+    return wrapper
+
+async def _raw_documents(model, *field_names):
+    """Read `field_names` (plus `_id` as `id`) straight from the collection as plain dicts"""
+    # Skips Beanie/Pydantic entirely for read-only responses that are just document fields
+    pipeline = [{"$project": {"_id": 0, "id": "$_id", **{name: 1 for name in field_names}}}]
+    return await model.get_motor_collection().aggregate(pipeline).to_list(length=None)
+
+# Users fetched in the last minute, by id (user records rarely change)
+_user_cache = TTLCache(maxsize=10_000, ttl=60)
+
+async def _get_users(user_ids):
+    """Map user ids to UserBrief views, querying only the ids that aren't cached"""
+    users = {}
+    missing = []
+    for user_id in set(user_ids):
+        user = _user_cache.get(user_id)
+        if user is None:
+            missing.append(user_id)
+        else:
+            users[user_id] = user
+    if missing:
+        for user in await User.find({"_id": {"$in": sorted(missing)}}).project(UserBrief).to_list():
+            _user_cache[user.id] = users[user.id] = user
+    return users
+
+def _user_details_projection(field):
+    """$project expression for an embedded user looked up into `field`"""
+    return {"$cond": [{"$ifNull": [f"${field}", False]}, {
+        "id": f"${field}._id",
+        "name": f"${field}.name",
+        "email": f"${field}.email",
+        "phone": f"${field}.phone",
+        "role": f"${field}.role",
+        "avatar": {"$ifNull": [f"${field}.avatar", None]},
+        "created_at": {"$ifNull": [f"${field}.created_at", None]},
+        "is_active": f"${field}.is_active"
+    }, None]}
+
+def _lookup_one(collection, local_field, as_field):
+    """$lookup + $unwind stages that embed at most one matching document"""
+    return [
+        {"$lookup": {"from": collection, "localField": local_field, "foreignField": "_id", "as": as_field}},
+        {"$unwind": {"path": f"${as_field}", "preserveNullAndEmptyArrays": True}},
+    ]
+
 # Debug endpoints (no authentication required)
 @app.get("/debug/data")
+@_cached_debug_response
 async def debug_data():
     """Debug endpoint to check all data without authentication"""
     try:
-        # Get all users
-        users = await User.find_all().to_list()
-        drivers = await Driver.find_all().to_list()
-        passengers = await Passenger.find_all().to_list()
-        vehicles = await Vehicle.find_all().to_list()
+        # Get all users, drivers, passengers and vehicles concurrently
+        users, drivers, passengers, vehicles = await asyncio.gather(
+            _raw_documents(User, "name", "email", "role"),
+            _raw_documents(Driver, "user_id", "vehicle_make", "license_plate"),
+            _raw_documents(Passenger, "user_id"),
+            _raw_documents(Vehicle, "vehicle_make", "license_plate"),
+        )
         
         return {
             "status": "success",
@@ -95,73 +267,60 @@ async def debug_data():
                 "drivers_count": len(drivers),
                 "passengers_count": len(passengers),
                 "vehicles_count": len(vehicles),
-                "users": [{"id": u.id, "name": u.name, "email": u.email, "role": u.role} for u in users],
-                "drivers": [{"id": d.id, "user_id": d.user_id, "vehicle_make": d.vehicle_make, "license_plate": d.license_plate} for d in drivers],
-                "passengers": [{"id": p.id, "user_id": p.user_id} for p in passengers],
-                "vehicles": [{"id": v.id, "vehicle_make": v.vehicle_make, "license_plate": v.license_plate} for v in vehicles]
+                "users": users,
+                "drivers": drivers,
+                "passengers": passengers,
+                "vehicles": vehicles
             }
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/debug/users")
+@_cached_debug_response
 async def debug_users():
     """Get all users without authentication"""
     try:
-        users = await User.find_all().to_list()
+        users = await _raw_documents(User, "name", "email", "phone", "role", "created_at")
         return {
             "status": "success",
-            "users": [
-                {
-                    "id": user.id,
-                    "name": user.name,
-                    "email": user.email,
-                    "phone": user.phone,
-                    "role": user.role,
-                    "created_at": user.created_at.isoformat() if user.created_at else None
-                }
-                for user in users
-            ]
+            "users": users
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/debug/users-simple")
+@_cached_debug_response
 async def debug_users_simple():
     """Get all users in simple format without authentication"""
     try:
-        users = await User.find_all().to_list()
+        users = await _raw_documents(User, "name", "email", "phone", "role")
         return {
             "status": "success",
-            "users": [
-                {
-                    "id": user.id,
-                    "name": user.name,
-                    "email": user.email,
-                    "phone": user.phone,
-                    "role": user.role
-                }
-                for user in users
-            ]
+            "users": users
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/debug/drivers")
+@_cached_debug_response
 async def debug_drivers():
     """Get all drivers without authentication (for testing)"""
     try:
-        print("🔍 Debug: Fetching all drivers...")
+        logger.debug("Debug: fetching all drivers")
         drivers = await Driver.find_all().to_list()
         
-        # Get user info for each driver
+        # Fetch user info for all drivers in one query
+        user_ids = [driver.user_id for driver in drivers]
+        users = await _get_users(user_ids)
+        
         driver_list = []
         for driver in drivers:
             try:
-                user = await User.get(driver.user_id)
+                user = users.get(driver.user_id)
                 driver_data = {
-                    "id": str(driver.id),
-                    "user_id": str(driver.user_id),
+                    "id": driver.id,
+                    "user_id": driver.user_id,
                     "user_name": user.name if user else "Unknown",
                     "user_email": user.email if user else "Unknown",
                     "user_phone": user.phone if user else "Unknown",
@@ -171,7 +330,7 @@ async def debug_drivers():
                     "license_plate": driver.license_plate,
                     "vehicle_color": driver.vehicle_color,
                     "license_number": driver.license_number,
-                    "license_expiry": driver.license_expiry.isoformat() if driver.license_expiry else None,
+                    "license_expiry": driver.license_expiry,
                     "rating": driver.rating,
                     "total_rides": driver.total_rides,
                     "current_km_reading": driver.current_km_reading,
@@ -180,308 +339,229 @@ async def debug_drivers():
                     "updated_at": getattr(driver, 'updated_at', None)
                 }
                 
-                # Convert datetime objects to ISO format if they exist
-                if driver_data["created_at"]:
-                    driver_data["created_at"] = driver_data["created_at"].isoformat()
-                if driver_data["updated_at"]:
-                    driver_data["updated_at"] = driver_data["updated_at"].isoformat()
-                
                 driver_list.append(driver_data)
-            except Exception as e:
-                print(f"❌ Error processing driver {driver.id}: {e}")
+            except Exception:
+                logger.exception("Error processing driver %s", driver.id)
                 continue
         
-        print(f"✅ Debug: Found {len(driver_list)} drivers")
+        logger.debug("Debug: found %d drivers", len(driver_list))
         return {"status": "success", "drivers": driver_list}
     except Exception as e:
-        print(f"❌ Debug: Error fetching drivers: {e}")
+        logger.exception("Debug: error fetching drivers")
         return {"status": "error", "message": str(e)}
 
+_VEHICLE_FIELDS = {
+    "vehicle_make": 1,
+    "vehicle_model": 1,
+    "vehicle_year": 1,
+    "license_plate": 1,
+    "vehicle_color": 1,
+    "license_number": 1,
+    "license_expiry": 1
+}
+
+def _vehicles_pipeline(driver_stages, driver_fields):
+    """Direct vehicles followed by vehicles attached to drivers, unioned server-side"""
+    return [
+        {"$project": {
+            "_id": 0,
+            "id": "$_id",
+            **_VEHICLE_FIELDS,
+            "created_at": {"$ifNull": ["$created_at", None]},
+            "updated_at": {"$ifNull": ["$updated_at", None]}
+        }},
+        {"$unionWith": {"coll": "drivers", "pipeline": [
+            # Only drivers with vehicle details filled in
+            {"$match": {
+                field: {"$nin": [None, ""]}
+                for field in ("vehicle_make", "vehicle_model", "license_plate", "vehicle_color")
+            }},
+            *driver_stages,
+            {"$project": {
+                "_id": 0,
+                **driver_fields,
+                **_VEHICLE_FIELDS,
+                "created_at": {"$literal": None},
+                "updated_at": {"$literal": None}
+            }}
+        ]}}
+    ]
+
+_DEBUG_VEHICLES_PIPELINE = _vehicles_pipeline(
+    _lookup_one("users", "user_id", "user"),
+    {
+        "id": {"$concat": ["driver_", "$_id"]},
+        "driver_id": "$_id",
+        "driver_name": {"$ifNull": ["$user.name", "Unknown"]}
+    }
+)
+_VEHICLES_PIPELINE = _vehicles_pipeline([], {"id": "$_id"})
+
 @app.get("/debug/vehicles")
+@_cached_debug_response
 async def debug_vehicles():
     """Get all vehicles without authentication (for testing)"""
     try:
-        print("🔍 Debug: Fetching all vehicles...")
-        
-        # Get vehicles created directly
-        vehicles = await Vehicle.find_all().to_list()
-        vehicle_list = []
+        logger.debug("Debug: fetching all vehicles")
         
-        for vehicle in vehicles:
-            vehicle_data = {
-                "id": str(vehicle.id),
-                "vehicle_make": vehicle.vehicle_make,
-                "vehicle_model": vehicle.vehicle_model,
-                "vehicle_year": vehicle.vehicle_year,
-                "license_plate": vehicle.license_plate,
-                "vehicle_color": vehicle.vehicle_color,
-                "license_number": vehicle.license_number,
-                "license_expiry": vehicle.license_expiry.isoformat() if vehicle.license_expiry else None,
-                "created_at": getattr(vehicle, 'created_at', None),
-                "updated_at": getattr(vehicle, 'updated_at', None)
-            }
-            
-            # Convert datetime objects to ISO format if they exist
-            if vehicle_data["created_at"]:
-                vehicle_data["created_at"] = vehicle_data["created_at"].isoformat()
-            if vehicle_data["updated_at"]:
-                vehicle_data["updated_at"] = vehicle_data["updated_at"].isoformat()
-            
-            vehicle_list.append(vehicle_data)
-        
-        # Get vehicles from drivers
-        drivers = await Driver.find_all().to_list()
-        for driver in drivers:
-            if (driver.vehicle_make and driver.vehicle_model and 
-                driver.license_plate and driver.vehicle_color):
-                try:
-                    user = await User.get(driver.user_id)
-                    vehicle_data = {
-                        "id": f"driver_{str(driver.id)}",
-                        "driver_id": str(driver.id),
-                        "driver_name": user.name if user else "Unknown",
-                        "vehicle_make": driver.vehicle_make,
-                        "vehicle_model": driver.vehicle_model,
-                        "vehicle_year": driver.vehicle_year,
-                        "license_plate": driver.license_plate,
-                        "vehicle_color": driver.vehicle_color,
-                        "license_number": driver.license_number,
-                        "license_expiry": driver.license_expiry.isoformat() if driver.license_expiry else None,
-                        "created_at": getattr(driver, 'created_at', None),
-                        "updated_at": getattr(driver, 'updated_at', None)
-                    }
-                    
-                    # Convert datetime objects to ISO format if they exist
-                    if vehicle_data["created_at"]:
-                        vehicle_data["created_at"] = vehicle_data["created_at"].isoformat()
-                    if vehicle_data["updated_at"]:
-                        vehicle_data["updated_at"] = vehicle_data["updated_at"].isoformat()
-                    
-                    vehicle_list.append(vehicle_data)
-                except Exception as e:
-                    print(f"❌ Error processing driver vehicle {driver.id}: {e}")
-                    continue
+        # Vehicles created directly plus vehicles from drivers, in one aggregation
+        vehicle_list = await Vehicle.aggregate(_DEBUG_VEHICLES_PIPELINE).to_list()
         
-        print(f"✅ Debug: Found {len(vehicle_list)} vehicles")
+        logger.debug("Debug: found %d vehicles", len(vehicle_list))
         return {"status": "success", "vehicles": vehicle_list}
     except Exception as e:
-        print(f"❌ Debug: Error fetching vehicles: {e}")
+        logger.exception("Debug: error fetching vehicles")
         return {"status": "error", "message": str(e)}
 
+# Fields returned by /debug/rides, read from each ride with a single attrgetter call
+_DEBUG_RIDE_FIELDS = (
+    "id", "passenger_id", "driver_id", "status", "pickup_address", "dropoff_address",
+    "requested_at", "assigned_at", "picked_up_at", "completed_at", "distance", "start_km", "end_km",
+)
+_debug_ride_values = attrgetter(*_DEBUG_RIDE_FIELDS)
+
 @app.get("/debug/rides")
+@_cached_debug_response
 async def debug_rides():
     """Get all rides without authentication (for testing)"""
-    try:
-        print("🔍 Debug: Fetching all rides...")
-        rides = await Ride.find_all().to_list()
-        
-        print(f"✅ Debug: Found {len(rides)} rides")
-        
-        ride_list = []
-        for ride in rides:
-            ride_data = {
-                "id": str(ride.id),
-                "passenger_id": ride.passenger_id,
-                "driver_id": ride.driver_id,
-                "status": ride.status,
-                "pickup_address": ride.pickup_address,
-                "dropoff_address": ride.dropoff_address,
-                "requested_at": ride.requested_at.isoformat() if ride.requested_at else None,
-                "assigned_at": ride.assigned_at.isoformat() if ride.assigned_at else None,
-                "picked_up_at": ride.picked_up_at.isoformat() if ride.picked_up_at else None,
-                "completed_at": ride.completed_at.isoformat() if ride.completed_at else None,
-                "distance": ride.distance,
-                "start_km": ride.start_km,
-                "end_km": ride.end_km
-            }
-            ride_list.append(ride_data)
-        
-        return {"status": "success", "rides": ride_list}
-    except Exception as e:
-        print(f"❌ Debug: Error fetching rides: {e}")
-        return {"status": "error", "message": str(e)}
+    logger.debug("Debug: fetching all rides")
+    
+    # Each ride is encoded and sent as soon as it comes off the cursor
+    ride_list = (
+        dict(zip(_DEBUG_RIDE_FIELDS, _debug_ride_values(ride)))
+        async for ride in Ride.find_all().project(RideBrief)
+    )
+    return _stream_debug_list("rides", ride_list)
+
+# Fuel entries with their driver's vehicle and name, shaped server-side to the response format
+_FUEL_ENTRIES_PIPELINE = [
+    *_lookup_one("drivers", "driver_id", "driver"),
+    *_lookup_one("users", "driver.user_id", "driver_user"),
+    {"$project": {
+        "_id": 0,
+        "id": "$_id",
+        "driver_id": 1,
+        "driver_name": {"$ifNull": ["$driver_user.name", "Unknown"]},
+        "vehicle_make": {"$ifNull": ["$driver.vehicle_make", "Unknown"]},
+        "license_plate": {"$ifNull": ["$driver.license_plate", "Unknown"]},
+        "fuel_amount": 1,
+        "fuel_cost": 1,
+        "fuel_type": 1,
+        "odometer_reading": 1,
+        "fuel_station": 1,
+        "date": 1,
+        "created_at": 1
+    }}
+]
 
 @app.get("/debug/fuel-entries")
+@_cached_debug_response
 async def debug_fuel_entries():
     """Get all fuel entries without authentication (for testing)"""
     try:
-        print("🔍 Debug: Fetching all fuel entries...")
-        fuel_entries = await FuelEntry.find_all().to_list()
+        logger.debug("Debug: fetching all fuel entries")
         
-        # Get driver info for each fuel entry
-        fuel_list = []
-        for entry in fuel_entries:
-            try:
-                driver = await Driver.get(entry.driver_id)
-                user = None
-                if driver:
-                    user = await User.get(driver.user_id)
-                
-                fuel_data = {
-                    "id": str(entry.id),
-                    "driver_id": str(entry.driver_id),
-                    "driver_name": user.name if user else "Unknown",
-                    "vehicle_make": driver.vehicle_make if driver else "Unknown",
-                    "license_plate": driver.license_plate if driver else "Unknown",
-                    "fuel_amount": entry.fuel_amount,
-                    "fuel_cost": entry.fuel_cost,
-                    "fuel_type": entry.fuel_type,
-                    "odometer_reading": entry.odometer_reading,
-                    "fuel_station": entry.fuel_station,
-                    "date": entry.date.isoformat() if entry.date else None,
-                    "created_at": entry.created_at.isoformat() if entry.created_at else None
-                }
-                fuel_list.append(fuel_data)
-            except Exception as e:
-                print(f"❌ Error processing fuel entry {entry.id}: {e}")
-                continue
+        # Join fuel entries with their drivers and users in one round trip
+        fuel_list = await FuelEntry.aggregate(_FUEL_ENTRIES_PIPELINE).to_list()
         
-        print(f"✅ Debug: Found {len(fuel_list)} fuel entries")
+        logger.debug("Debug: found %d fuel entries", len(fuel_list))
         return {"status": "success", "fuel_entries": fuel_list}
     except Exception as e:
-        print(f"❌ Debug: Error fetching fuel entries: {e}")
+        logger.exception("Debug: error fetching fuel entries")
         return {"status": "error", "message": str(e)}
 
-@app.get("/debug/rides-with-details")
+# Ride fields in the response format, for the $project stage of ride pipelines
+_RIDE_FIELDS_PROJECTION = {
+    "_id": 0,
+    "id": "$_id",
+    "passenger_id": 1,
+    "driver_id": {"$ifNull": ["$driver_id", None]},
+    "status": 1,
+    "pickup_latitude": 1,
+    "pickup_longitude": 1,
+    "pickup_address": 1,
+    "dropoff_latitude": 1,
+    "dropoff_longitude": 1,
+    "dropoff_address": 1,
+    "requested_at": 1,
+    "assigned_at": {"$ifNull": ["$assigned_at", None]},
+    "picked_up_at": {"$ifNull": ["$picked_up_at", None]},
+    "completed_at": {"$ifNull": ["$completed_at", None]},
+    "distance": 1,
+    "start_km": {"$ifNull": ["$start_km", None]},
+    "end_km": {"$ifNull": ["$end_km", None]}
+}
+
+# Passenger looked up into `passenger` (and its user into `passenger_user`)
+_PASSENGER_DETAILS_PROJECTION = {"$cond": [{"$ifNull": ["$passenger", False]}, {
+    "id": "$passenger._id",
+    "user_id": "$passenger.user_id",
+    "rating": "$passenger.rating",
+    "total_rides": "$passenger.total_rides",
+    "user": _user_details_projection("passenger_user")
+}, None]}
+
+# Rides with passenger/driver details, shaped server-side to the response format
+_RIDE_DETAILS_PIPELINE = [
+    *_lookup_one("passengers", "passenger_id", "passenger"),
+    *_lookup_one("drivers", "driver_id", "driver"),
+    *_lookup_one("users", "passenger.user_id", "passenger_user"),
+    *_lookup_one("users", "driver.user_id", "driver_user"),
+    {"$project": {
+        **_RIDE_FIELDS_PROJECTION,
+        "passenger": _PASSENGER_DETAILS_PROJECTION,
+        "driver": {"$cond": [{"$ifNull": ["$driver", False]}, {
+            "id": "$driver._id",
+            "user_id": "$driver.user_id",
+            "vehicle_make": "$driver.vehicle_make",
+            "vehicle_model": "$driver.vehicle_model",
+            "license_plate": "$driver.license_plate",
+            "is_online": "$driver.is_online",
+            "user": _user_details_projection("driver_user")
+        }, None]}
+    }}
+]
+
+# The handler returns pre-encoded bodies, so the model only documents the response in OpenAPI
+@app.get("/debug/rides-with-details", responses={200: {"model": RidesWithDetailsResponse}})
+@_cached_debug_response
 async def debug_get_rides_with_details():
     """Get all rides with passenger and driver details for admin"""
-    try:
-        # Fetch all rides
-        rides = await Ride.find_all().to_list()
-        
-        # Collect all passenger and driver IDs
-        passenger_ids = [ride.passenger_id for ride in rides if ride.passenger_id]
-        driver_ids = [ride.driver_id for ride in rides if ride.driver_id]
-        
-        # Fetch passengers
-        passengers = {p.id: p async for p in Passenger.find({"_id": {"$in": passenger_ids}})}
-        
-        # Fetch drivers
-        drivers = {d.id: d async for d in Driver.find({"_id": {"$in": driver_ids}})}
-        
-        # Fetch all user IDs for passengers and drivers
-        passenger_user_ids = [p.user_id for p in passengers.values()]
-        driver_user_ids = [d.user_id for d in drivers.values()]
-        all_user_ids = list(set(passenger_user_ids + driver_user_ids))
-        
-        # Fetch all users
-        users = {str(u.id): u async for u in User.find({"_id": {"$in": all_user_ids}})}
-        
-        # Create response with full details
-        ride_responses = []
-        for ride in rides:
-            passenger = passengers.get(ride.passenger_id)
-            driver = drivers.get(ride.driver_id) if ride.driver_id else None
-            
-            passenger_user = None
-            driver_user = None
-            
-            if passenger:
-                passenger_user = users.get(str(passenger.user_id))
-            if driver:
-                driver_user = users.get(str(driver.user_id))
-            
-            # Create ride response with full details
-            ride_response = {
-                "id": str(ride.id),
-                "passenger_id": ride.passenger_id,
-                "driver_id": ride.driver_id,
-                "status": ride.status,
-                "pickup_latitude": ride.pickup_latitude,
-                "pickup_longitude": ride.pickup_longitude,
-                "pickup_address": ride.pickup_address,
-                "dropoff_latitude": ride.dropoff_latitude,
-                "dropoff_longitude": ride.dropoff_longitude,
-                "dropoff_address": ride.dropoff_address,
-                "requested_at": ride.requested_at.isoformat() if ride.requested_at else None,
-                "assigned_at": ride.assigned_at.isoformat() if ride.assigned_at else None,
-                "picked_up_at": ride.picked_up_at.isoformat() if ride.picked_up_at else None,
-                "completed_at": ride.completed_at.isoformat() if ride.completed_at else None,
-                "distance": ride.distance,
-                "start_km": ride.start_km,
-                "end_km": ride.end_km,
-                "passenger": {
-                    "id": str(passenger.id) if passenger else None,
-                    "user_id": passenger.user_id if passenger else None,
-                    "rating": passenger.rating if passenger else 0.0,
-                    "total_rides": passenger.total_rides if passenger else 0,
-                    "user": {
-                        "id": str(passenger_user.id) if passenger_user else None,
-                        "name": passenger_user.name if passenger_user else "Unknown",
-                        "email": passenger_user.email if passenger_user else "No email",
-                        "phone": passenger_user.phone if passenger_user else "No phone",
-                        "role": passenger_user.role if passenger_user else "passenger",
-                        "avatar": passenger_user.avatar if passenger_user else None,
-                        "created_at": passenger_user.created_at.isoformat() if passenger_user and passenger_user.created_at else None,
-                        "is_active": passenger_user.is_active if passenger_user else True
-                    } if passenger_user else None
-                } if passenger else None,
-                "driver": {
-                    "id": str(driver.id) if driver else None,
-                    "user_id": driver.user_id if driver else None,
-                    "vehicle_make": driver.vehicle_make if driver else None,
-                    "vehicle_model": driver.vehicle_model if driver else None,
-                    "license_plate": driver.license_plate if driver else None,
-                    "is_online": driver.is_online if driver else False,
-                    "user": {
-                        "id": str(driver_user.id) if driver_user else None,
-                        "name": driver_user.name if driver_user else "Unknown",
-                        "email": driver_user.email if driver_user else "No email",
-                        "phone": driver_user.phone if driver_user else "No phone",
-                        "role": driver_user.role if driver_user else "driver",
-                        "avatar": driver_user.avatar if driver_user else None,
-                        "created_at": driver_user.created_at.isoformat() if driver_user and driver_user.created_at else None,
-                        "is_active": driver_user.is_active if driver_user else True
-                    } if driver_user else None
-                } if driver else None
-            }
-            ride_responses.append(ride_response)
-        
-        return {
-            "status": "success",
-            "rides": ride_responses,
-            "total": len(ride_responses)
-        }
-        
-    except Exception as e:
-        print(f"Error in debug_get_rides_with_details: {e}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "rides": []
-        }
+    # Join rides with passengers, drivers and their users in one round trip,
+    # streaming each joined ride out as the aggregation cursor yields it
+    return _stream_debug_list("rides", Ride.aggregate(_RIDE_DETAILS_PIPELINE), with_total=True)
 
 # Authentication endpoints
 @app.post("/auth/login")
 async def login(user_credentials: dict):
-    print(f"🔐 Login attempt for email: {user_credentials.get('email')}")
+    logger.debug("Login attempt for email: %s", user_credentials.get("email"))
     
     user = await User.find_one({"email": user_credentials.get("email")})
     
     if not user:
-        print(f"❌ User not found for email: {user_credentials.get('email')}")
+        logger.info("Login failed, user not found for email: %s", user_credentials.get("email"))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
-    print(f"✅ User found: {user.name} (role: {user.role})")
+    logger.debug("User found: %s (role: %s)", user.name, user.role)
     
-    if not verify_password(user_credentials.get("password"), user.password_hash):
-        print(f"❌ Password verification failed for user: {user.email}")
+    if not await verify_password_async(user_credentials.get("password"), user.password_hash):
+        logger.info("Login failed, password verification failed for user: %s", user.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
-    print(f"✅ Password verified successfully for user: {user.email}")
+    logger.debug("Password verified successfully for user: %s", user.email)
     
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
     
-    print(f"🎉 Login successful for user: {user.name}")
+    logger.debug("Login successful for user: %s", user.name)
     
     return {
         "access_token": access_token,
@@ -494,43 +574,40 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 # User management endpoints (admin only)
+async def _insert_new_user(new_user):
+    """Insert a user, relying on the unique email index to reject duplicates"""
+    try:
+        await new_user.insert()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="User with this email already exists")
+
 @app.post("/users")
 async def create_user(user_data: dict, current_user: User = Depends(get_current_admin)):
     """Create a new user (admin only)"""
-    # Check if user with this email already exists
-    existing_user = await User.find_one({"email": user_data.get("email")})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="User with this email already exists")
-    
     # Create new user
     new_user = User(
         name=user_data.get("name"),
         email=user_data.get("email"),
         phone=user_data.get("phone"),
         role=user_data.get("role"),
-        password_hash=get_password_hash("password"),  # Default password
+        password_hash=DEFAULT_PASSWORD_HASH,  # Default password ("password")
     )
-    await new_user.insert()
+    await _insert_new_user(new_user)
     
     return new_user
 
 @app.post("/drivers")
 async def create_driver(driver_data: dict, current_user: User = Depends(get_current_admin)):
     """Create a new driver (admin only)"""
-    # Check if user with this email already exists
-    existing_user = await User.find_one({"email": driver_data.get("user", {}).get("email")})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="User with this email already exists")
-    
     # Create user first
     new_user = User(
         name=driver_data.get("user", {}).get("name"),
         email=driver_data.get("user", {}).get("email"),
         phone=driver_data.get("user", {}).get("phone"),
         role="driver",
-        password_hash=get_password_hash("password"),  # Default password
+        password_hash=DEFAULT_PASSWORD_HASH,  # Default password ("password")
     )
-    await new_user.insert()
+    await _insert_new_user(new_user)
     
     # Create driver profile (without vehicle info)
     driver_profile = await Driver.create_driver(
@@ -547,20 +624,15 @@ async def create_driver(driver_data: dict, current_user: User = Depends(get_curr
 @app.post("/passengers")
 async def create_passenger(passenger_data: dict, current_user: User = Depends(get_current_admin)):
     """Create a new passenger (admin only)"""
-    # Check if user with this email already exists
-    existing_user = await User.find_one({"email": passenger_data.get("user", {}).get("email")})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="User with this email already exists")
-    
     # Create user first
     new_user = User(
         name=passenger_data.get("user", {}).get("name"),
         email=passenger_data.get("user", {}).get("email"),
         phone=passenger_data.get("user", {}).get("phone"),
         role="passenger",
-        password_hash=get_password_hash("password"),  # Default password
+        password_hash=DEFAULT_PASSWORD_HASH,  # Default password ("password")
     )
-    await new_user.insert()
+    await _insert_new_user(new_user)
     
     # Create passenger profile
     passenger_profile = Passenger(
@@ -584,19 +656,19 @@ async def get_all_passengers(current_user: User = Depends(get_current_admin)):
     """Get all passengers (admin only)"""
     passengers = await Passenger.find_all().to_list()
     user_ids = [p.user_id for p in passengers]
-    users = {str(u.id): u async for u in User.find({"_id": {"$in": user_ids}})}
+    users = await _get_users(user_ids)
     response = []
     for p in passengers:
-        user = users.get(str(p.user_id))
-        passenger_dict = p.dict()
-        passenger_dict["user"] = user.dict() if user else None
+        user = users.get(p.user_id)
+        passenger_dict = p.model_dump()
+        passenger_dict["user"] = user.model_dump() if user else None
         response.append(passenger_dict)
     return response
 
 @app.post("/vehicles")
 async def create_vehicle(vehicle_data: dict, current_user: User = Depends(get_current_admin)):
     """Create a new vehicle (admin only, not attached to a driver)"""
-    print(f"🚗 Creating vehicle with data: {vehicle_data}")
+    logger.debug("Creating vehicle with data: %s", vehicle_data)
     
     # Validate required fields
     required_fields = [
@@ -605,7 +677,7 @@ async def create_vehicle(vehicle_data: dict, current_user: User = Depends(get_cu
     ]
     for field in required_fields:
         if not vehicle_data.get(field):
-            print(f"❌ Missing required field: {field}")
+            logger.info("Vehicle rejected, missing required field: %s", field)
             raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
     
     # Parse license_expiry to datetime
@@ -613,9 +685,9 @@ async def create_vehicle(vehicle_data: dict, current_user: User = Depends(get_cu
     if isinstance(license_expiry, str):
         try:
             license_expiry = datetime.strptime(license_expiry, "%d-%m-%Y")
-            print(f"✅ Parsed license_expiry: {license_expiry}")
+            logger.debug("Parsed license_expiry: %s", license_expiry)
         except Exception as e:
-            print(f"❌ Error parsing license_expiry: {e}")
+            logger.info("Vehicle rejected, error parsing license_expiry: %s", e)
             raise HTTPException(status_code=400, detail="license_expiry must be in DD-MM-YYYY format")
     
     try:
@@ -629,127 +701,65 @@ async def create_vehicle(vehicle_data: dict, current_user: User = Depends(get_cu
             license_expiry=license_expiry
         )
         await vehicle.insert()
-        print(f"✅ Vehicle created successfully with ID: {vehicle.id}")
+        logger.info("Vehicle created successfully with ID: %s", vehicle.id)
         return vehicle
     except Exception as e:
-        print(f"❌ Error creating vehicle: {e}")
+        logger.exception("Error creating vehicle")
         raise HTTPException(status_code=500, detail=f"Failed to create vehicle: {str(e)}")
 
 @app.get("/vehicles")
 async def get_all_vehicles(current_user: User = Depends(get_current_admin)):
     """Get all vehicles (admin only) - includes both direct vehicles and driver vehicles"""
-    # Vehicles created directly
-    vehicles = await Vehicle.find_all().to_list()
-    vehicle_list = [
-        {
-            "id": v.id,
-            "vehicle_make": v.vehicle_make,
-            "vehicle_model": v.vehicle_model,
-            "vehicle_year": v.vehicle_year,
-            "license_plate": v.license_plate,
-            "vehicle_color": v.vehicle_color,
-            "license_number": v.license_number,
-            "license_expiry": v.license_expiry.isoformat() if v.license_expiry else None,
-            "created_at": v.created_at.isoformat() if v.created_at else None,
-            "updated_at": v.updated_at.isoformat() if v.updated_at else None
-        }
-        for v in vehicles
-    ]
-    # Vehicles attached to drivers
-    drivers = await Driver.find_all().to_list()
-    for driver in drivers:
-        if (driver.vehicle_make and driver.vehicle_model and 
-            driver.license_plate and driver.vehicle_color):
-            vehicle_list.append({
-                "id": str(driver.id),
-                "vehicle_make": driver.vehicle_make,
-                "vehicle_model": driver.vehicle_model,
-                "vehicle_year": driver.vehicle_year,
-                "license_plate": driver.license_plate,
-                "vehicle_color": driver.vehicle_color,
-                "license_number": driver.license_number,
-                "license_expiry": driver.license_expiry.isoformat() if driver.license_expiry else None,
-                "created_at": driver.created_at.isoformat() if hasattr(driver, 'created_at') and driver.created_at else None,
-                "updated_at": driver.updated_at.isoformat() if hasattr(driver, 'updated_at') and driver.updated_at else None
-            })
-    return vehicle_list
+    # Vehicles created directly and vehicles attached to drivers, in one aggregation
+    return await Vehicle.aggregate(_VEHICLES_PIPELINE).to_list()
 
 # Fuel entries management
 @app.get("/fuel-entries")
 async def get_fuel_entries(current_user: User = Depends(get_current_admin)):
     """Get all fuel entries (admin only)"""
     try:
-        fuel_entries = await FuelEntry.find_all().to_list()
-        
-        # Get driver info for each fuel entry
-        fuel_list = []
-        for entry in fuel_entries:
-            try:
-                driver = await Driver.get(entry.driver_id)
-                user = None
-                if driver:
-                    user = await User.get(driver.user_id)
-                
-                fuel_data = {
-                    "id": str(entry.id),
-                    "driver_id": str(entry.driver_id),
-                    "driver_name": user.name if user else "Unknown",
-                    "vehicle_make": driver.vehicle_make if driver else "Unknown",
-                    "license_plate": driver.license_plate if driver else "Unknown",
-                    "fuel_amount": entry.fuel_amount,
-                    "fuel_cost": entry.fuel_cost,
-                    "fuel_type": entry.fuel_type,
-                    "odometer_reading": entry.odometer_reading,
-                    "fuel_station": entry.fuel_station,
-                    "date": entry.date.isoformat() if entry.date else None,
-                    "created_at": entry.created_at.isoformat() if entry.created_at else None
-                }
-                fuel_list.append(fuel_data)
-            except Exception as e:
-                print(f"❌ Error processing fuel entry {entry.id}: {e}")
-                continue
+        # Join fuel entries with their drivers and users in one round trip
+        fuel_list = await FuelEntry.aggregate(_FUEL_ENTRIES_PIPELINE).to_list()
         
         return {"status": "success", "fuel_entries": fuel_list}
     except Exception as e:
-        print(f"❌ Error fetching fuel entries: {e}")
+        logger.exception("Error fetching fuel entries")
         return {"status": "error", "message": str(e)}
 
+def _new_fuel_entry(fuel_data: FuelEntryCreate, admin: User):
+    """Build a FuelEntry document from a validated request body"""
+    return FuelEntry(
+        **fuel_data.model_dump(exclude_none=True),
+        added_by="admin",
+        admin_id=admin.id
+    )
+
 @app.post("/fuel-entries")
-async def create_fuel_entry(fuel_data: dict, current_user: User = Depends(get_current_admin)):
+async def create_fuel_entry(fuel_data: FuelEntryCreate, current_user: User = Depends(get_current_admin)):
     """Create a new fuel entry (admin only)"""
     try:
-        # Validate required fields
-        required_fields = ["driver_id", "fuel_amount", "fuel_cost", "fuel_type", "odometer_reading"]
-        for field in required_fields:
-            if not fuel_data.get(field):
-                raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
-        
-        # Parse date if provided
-        fuel_date = fuel_data.get("date")
-        if fuel_date and isinstance(fuel_date, str):
-            try:
-                fuel_date = datetime.strptime(fuel_date, "%Y-%m-%d")
-            except:
-                fuel_date = datetime.utcnow()
-        else:
-            fuel_date = datetime.utcnow()
-        
-        fuel_entry = FuelEntry(
-            driver_id=fuel_data["driver_id"],
-            fuel_amount=float(fuel_data["fuel_amount"]),
-            fuel_cost=float(fuel_data["fuel_cost"]),
-            fuel_type=fuel_data["fuel_type"],
-            odometer_reading=float(fuel_data["odometer_reading"]),
-            fuel_station=fuel_data.get("fuel_station", "Unknown"),
-            date=fuel_date
-        )
+        # The body is already validated and coerced by FuelEntryCreate
+        fuel_entry = _new_fuel_entry(fuel_data, current_user)
         await fuel_entry.insert()
         
         return {"status": "success", "fuel_entry": fuel_entry}
     except Exception as e:
-        print(f"❌ Error creating fuel entry: {e}")
+        logger.exception("Error creating fuel entry")
         raise HTTPException(status_code=500, detail=f"Failed to create fuel entry: {str(e)}")
 
+@app.post("/fuel-entries/bulk")
+async def create_fuel_entries(fuel_data: List[FuelEntryCreate], current_user: User = Depends(get_current_admin)):
+    """Create several fuel entries in a single round trip (admin only)"""
+    if not fuel_data:
+        return {"status": "success", "created": 0}
+    try:
+        result = await FuelEntry.insert_many([_new_fuel_entry(entry, current_user) for entry in fuel_data])
+        
+        return {"status": "success", "created": len(result.inserted_ids)}
+    except Exception as e:
+        logger.exception("Error creating fuel entries")
+        raise HTTPException(status_code=500, detail=f"Failed to create fuel entries: {str(e)}")
+
 # Ride management
 @app.post("/rides")
 async def create_ride(ride_data: dict):
@@ -767,116 +777,98 @@ async def create_ride(ride_data: dict):
     await new_ride.insert()
     return new_ride
 
+# Embeds each ride's driver and passenger documents, each with its user (minus the password hash)
+_RIDE_PARTIES_STAGES = [
+    *_lookup_one("drivers", "driver_id", "driver"),
+    *_lookup_one("passengers", "passenger_id", "passenger"),
+    *_lookup_one("users", "driver.user_id", "driver_user"),
+    *_lookup_one("users", "passenger.user_id", "passenger_user"),
+    {"$addFields": {
+        "driver": {"$cond": [
+            {"$ifNull": ["$driver", False]}, {"$mergeObjects": ["$driver", {"user": "$driver_user"}]}, "$$REMOVE"
+        ]},
+        "passenger": {"$cond": [
+            {"$ifNull": ["$passenger", False]}, {"$mergeObjects": ["$passenger", {"user": "$passenger_user"}]}, "$$REMOVE"
+        ]}
+    }},
+    {"$project": {
+        "driver_user": 0,
+        "passenger_user": 0,
+        "driver.user.password_hash": 0,
+        "passenger.user.password_hash": 0
+    }}
+]
+
+# Page size limits for ride listings
+_RIDES_PAGE_SIZE = 100
+_RIDES_MAX_PAGE_SIZE = 500
+
+# Status values used in ride queries, bound once as plain strings
+_REQUESTED = RideStatus.REQUESTED.value
+_ACTIVE = [RideStatus.ASSIGNED.value, RideStatus.IN_PROGRESS.value]
+
+# Ride listings are streamed one document per line to clients that accept NDJSON
+_NDJSON = "application/x-ndjson"
+_STREAM_BATCH_SIZE = 500
+
+async def _ndjson_lines(rows):
+    """Encode each row as one JSON line as soon as it comes off the cursor"""
+    async for row in rows:
+        yield orjson.dumps(row) + b"\n"
+
+async def _ride_listing(request: Request, pipeline):
+    """Run a ride aggregation as an NDJSON stream if requested, otherwise as a JSON list"""
+    rides = Ride.aggregate(pipeline, batchSize=_STREAM_BATCH_SIZE)
+    if _NDJSON in request.headers.get("accept", ""):
+        return _streaming_response(request, _ndjson_lines(rides), _NDJSON)
+    return await rides.to_list()
+
 @app.get("/rides")
-async def get_rides(passenger_id: Optional[str] = None, driver_id: Optional[str] = None):
-    """Get rides with optional filters and populate driver and passenger info"""
+async def get_rides(
+    request: Request,
+    passenger_id: Optional[str] = None,
+    driver_id: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(_RIDES_PAGE_SIZE, ge=1, le=_RIDES_MAX_PAGE_SIZE),
+):
+    """Get rides (newest first, paginated) with optional filters and populate driver and passenger info"""
     query = {}
     if passenger_id:
         query["passenger_id"] = passenger_id
     if driver_id:
         query["driver_id"] = driver_id
 
-    rides = await Ride.find(query).to_list()
-
-    # Collect all driver and passenger IDs
-    driver_ids = [ride.driver_id for ride in rides if ride.driver_id]
-    passenger_ids = [ride.passenger_id for ride in rides if ride.passenger_id]
-
-    # Fetch drivers and passengers
-    drivers = {d.id: d async for d in Driver.find({"id": {"$in": driver_ids}})}
-    passengers = {p.id: p async for p in Passenger.find({"id": {"$in": passenger_ids}})}
-
-    # Fetch all user IDs
-    user_ids = [d.user_id for d in drivers.values()] + [p.user_id for p in passengers.values()]
-    users = {str(u.id): u async for u in User.find({"_id": {"$in": user_ids}})}
-
-    # Attach driver and passenger user info to each ride
-    for ride in rides:
-        driver = drivers.get(ride.driver_id)
-        if driver:
-            driver.user = users.get(str(driver.user_id))
-            ride.driver = driver
-        passenger = passengers.get(ride.passenger_id)
-        if passenger:
-            passenger.user = users.get(str(passenger.user_id))
-            ride.passenger = passenger
-
-    return rides
+    # Page before the lookups so only the returned rides are joined,
+    # then join each ride with its driver and passenger (and their users) in one round trip
+    return await _ride_listing(request, [
+        {"$match": query},
+        {"$sort": {"requested_at": -1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        *_RIDE_PARTIES_STAGES
+    ])
 
 @app.get("/rides/pending")
-async def get_pending_rides(current_user: User = Depends(get_current_admin)):
-    """Get all pending rides (admin only)"""
-    rides = await Ride.find({"status": RideStatus.REQUESTED}).to_list()
+async def get_pending_rides(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(_RIDES_PAGE_SIZE, ge=1, le=_RIDES_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_admin),
+):
+    """Get pending rides, oldest first and paginated (admin only)"""
+    rides = await Ride.find({"status": _REQUESTED}).sort(+Ride.requested_at).skip(skip).limit(limit).to_list()
     return rides
 
 @app.get("/rides/assigned")
-async def get_assigned_rides(current_user: User = Depends(get_current_driver)):
+async def get_assigned_rides(request: Request, driver: DriverBrief = Depends(get_current_driver_record)):
     """Get rides assigned to current driver"""
-    # First, find the driver record for this user
-    driver = await Driver.find_one({"user_id": current_user.id})
-    if not driver:
-        raise HTTPException(status_code=404, detail="Driver profile not found")
-    
-    # Now use the driver.id to find rides
-    rides = await Ride.find({"driver_id": driver.id, "status": {"$in": [RideStatus.ASSIGNED, RideStatus.IN_PROGRESS]}}).to_list()
-    
-    # Collect all passenger IDs
-    passenger_ids = [ride.passenger_id for ride in rides if ride.passenger_id]
-    
-    # Fetch passengers using _id field
-    passengers = {p.id: p async for p in Passenger.find({"_id": {"$in": passenger_ids}})}
-    
-    # Fetch all user IDs for passengers
-    user_ids = [p.user_id for p in passengers.values()]
-    users = {str(u.id): u async for u in User.find({"_id": {"$in": user_ids}})}
-    
-    # Create response with proper passenger structure
-    ride_responses = []
-    for ride in rides:
-        passenger = passengers.get(ride.passenger_id)
-        passenger_user = None
-        if passenger:
-            passenger_user = users.get(str(passenger.user_id))
-        
-        # Create ride response with passenger details
-        ride_response = {
-            "id": str(ride.id),
-            "passenger_id": ride.passenger_id,
-            "driver_id": ride.driver_id,
-            "status": ride.status,
-            "pickup_latitude": ride.pickup_latitude,
-            "pickup_longitude": ride.pickup_longitude,
-            "pickup_address": ride.pickup_address,
-            "dropoff_latitude": ride.dropoff_latitude,
-            "dropoff_longitude": ride.dropoff_longitude,
-            "dropoff_address": ride.dropoff_address,
-            "requested_at": ride.requested_at.isoformat() if ride.requested_at else None,
-            "assigned_at": ride.assigned_at.isoformat() if ride.assigned_at else None,
-            "picked_up_at": ride.picked_up_at.isoformat() if ride.picked_up_at else None,
-            "completed_at": ride.completed_at.isoformat() if ride.completed_at else None,
-            "distance": ride.distance,
-            "start_km": ride.start_km,
-            "end_km": ride.end_km,
-            "passenger": {
-                "id": str(passenger.id) if passenger else None,
-                "user_id": passenger.user_id if passenger else None,
-                "rating": passenger.rating if passenger else 0.0,
-                "total_rides": passenger.total_rides if passenger else 0,
-                "user": {
-                    "id": str(passenger_user.id) if passenger_user else None,
-                    "name": passenger_user.name if passenger_user else "Unknown",
-                    "email": passenger_user.email if passenger_user else "No email",
-                    "phone": passenger_user.phone if passenger_user else "No phone",
-                    "role": passenger_user.role if passenger_user else "passenger",
-                    "avatar": passenger_user.avatar if passenger_user else None,
-                    "created_at": passenger_user.created_at.isoformat() if passenger_user and passenger_user.created_at else None,
-                    "is_active": passenger_user.is_active if passenger_user else True
-                } if passenger_user else None
-            } if passenger else None
-        }
-        ride_responses.append(ride_response)
-    
-    return ride_responses
+    # Use the driver.id to find rides, joined with their passengers and
+    # passenger users and shaped into the response format by MongoDB
+    return await _ride_listing(request, [
+        {"$match": {"driver_id": driver.id, "status": {"$in": _ACTIVE}}},
+        *_lookup_one("passengers", "passenger_id", "passenger"),
+        *_lookup_one("users", "passenger.user_id", "passenger_user"),
+        {"$project": {**_RIDE_FIELDS_PROJECTION, "passenger": _PASSENGER_DETAILS_PROJECTION}}
+    ])
 
 # Railway deployment
 if __name__ == "__main__":
@@ -894,6 +886,9 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=port,
+        loop="auto",  # uvloop where uvicorn[standard] installs it (not on Windows)
+        http="httptools",
+        workers=int(os.environ.get("WEB_CONCURRENCY", 2)),
         reload=False,  # Disable reload in production
         log_level="info"
     ) 
\ No newline at end of file
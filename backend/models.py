@@ -1,4 +1,5 @@
 from beanie import Document, Indexed
+from pymongo import ASCENDING, IndexModel
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
@@ -40,7 +41,7 @@ class User(Document):
     class Settings:
         name = "users"
         indexes = [
-            "email",
+            IndexModel("email", unique=True),  # Enforces unique emails on insert
             "role",
             "created_at",
             "is_active"
@@ -163,7 +164,9 @@ class Ride(Document):
             "picked_up_at",
             "completed_at",
             "cancelled_at",
-            "distance"
+            "distance",
+            # A driver's rides in a given status (/rides/assigned)
+            IndexModel([("driver_id", ASCENDING), ("status", ASCENDING)])
         ]
 
 class KilometerEntry(Document):
@@ -188,12 +191,15 @@ class KilometerEntry(Document):
 class FuelEntry(Document):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     driver_id: str = Indexed(str)
-    amount: float  # liters
-    cost: float
+    fuel_amount: float  # liters
+    fuel_cost: float
+    fuel_type: str
+    odometer_reading: float
+    fuel_station: str = Field(default="Unknown")
     date: datetime = Field(default_factory=datetime.utcnow)
-    location: str
-    added_by: str  # driver, admin
+    added_by: str = Field(default="admin")  # driver, admin
     admin_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
         name = "fuel_entries"
@@ -325,4 +331,34 @@ class RideResponse(BaseModel):
     estimated_duration: int
     actual_duration: Optional[int] = None
     passenger: Optional[PassengerResponse] = None
-    driver: Optional[DriverResponse] = None 
\ No newline at end of file
+    driver: Optional[DriverResponse] = None
+
+# Projection models for read-only endpoints (only the listed fields are fetched)
+class RideBrief(BaseModel):
+    id: str = Field(alias="_id")
+    passenger_id: str
+    driver_id: Optional[str] = None
+    status: RideStatus
+    pickup_address: str
+    dropoff_address: str
+    requested_at: datetime
+    assigned_at: Optional[datetime] = None
+    picked_up_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    distance: float = 0.0
+    start_km: Optional[int] = None
+    end_km: Optional[int] = None
+
+class UserBrief(BaseModel):
+    id: str = Field(alias="_id")
+    name: str
+    email: str
+    phone: str
+    role: UserRole
+    avatar: Optional[str] = None
+    created_at: datetime
+    is_active: bool
+
+class DriverBrief(BaseModel):
+    id: str = Field(alias="_id")
+    user_id: str
\ No newline at end of file
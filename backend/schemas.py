@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, field_validator
+from datetime import datetime, date as dt_date
+from typing import Optional, List, Union
 from enum import Enum
 
 # Enums
@@ -198,12 +198,21 @@ class KilometerEntry(KilometerEntryBase):
 
 # Fuel Entry Schemas
 class FuelEntryBase(BaseModel):
-    amount: float
-    cost: float
-    location: str
+    fuel_amount: float
+    fuel_cost: float
+    fuel_type: str
+    odometer_reading: float
+    fuel_station: str = "Unknown"
 
 class FuelEntryCreate(FuelEntryBase):
     driver_id: str
+    date: Optional[Union[datetime, dt_date]] = None  # The admin form sends plain YYYY-MM-DD dates
+
+    @field_validator("date", mode="before")
+    @classmethod
+    def blank_date_to_none(cls, value):
+        # A date input left blank sends "", which means "now"
+        return None if value == "" else value
 
 class FuelEntry(FuelEntryBase):
     id: str
@@ -246,6 +255,60 @@ class Token(BaseModel):
     token_type: str
     user: User
 
+# Ride with embedded passenger/driver details (GET /debug/rides-with-details)
+class RideUserDetails(BaseModel):
+    id: str
+    name: str
+    email: str
+    phone: str
+    role: UserRole
+    avatar: Optional[str] = None
+    created_at: Optional[datetime] = None
+    is_active: bool
+
+class RidePassengerDetails(BaseModel):
+    id: str
+    user_id: str
+    rating: float
+    total_rides: int
+    user: Optional[RideUserDetails] = None
+
+class RideDriverDetails(BaseModel):
+    id: str
+    user_id: str
+    vehicle_make: str
+    vehicle_model: str
+    license_plate: str
+    is_online: bool
+    user: Optional[RideUserDetails] = None
+
+class RideWithDetails(BaseModel):
+    id: str
+    passenger_id: str
+    driver_id: Optional[str] = None
+    status: RideStatus
+    pickup_latitude: float
+    pickup_longitude: float
+    pickup_address: str
+    dropoff_latitude: float
+    dropoff_longitude: float
+    dropoff_address: str
+    requested_at: datetime
+    assigned_at: Optional[datetime] = None
+    picked_up_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    distance: float = 0.0
+    start_km: Optional[int] = None
+    end_km: Optional[int] = None
+    passenger: Optional[RidePassengerDetails] = None
+    driver: Optional[RideDriverDetails] = None
+
+class RidesWithDetailsResponse(BaseModel):
+    status: str  # "success" or "error"
+    rides: List[RideWithDetails]
+    total: Optional[int] = None  # success only
+    message: Optional[str] = None  # error only
+
 class DriverStatus(BaseModel):
     is_online: bool
     last_status_change: datetime
@@ -6,7 +6,6 @@ Run this script to start the FastAPI server locally
 
 import uvicorn
 import os
-from main import app
 
 if __name__ == "__main__":
     # Get port from environment or use default
@@ -19,11 +18,17 @@ if __name__ == "__main__":
     print(f"🔧 Health check: http://{host}:{port}/health")
     print("=" * 50)
     
+    # Auto-reload is opt-in (DEV=1) and always runs a single process
+    reload = os.environ.get("DEV") == "1"
+    
     # Start the server
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
-        reload=True,  # Enable auto-reload for development
+        loop="auto",  # uvloop where uvicorn[standard] installs it (not on Windows)
+        http="httptools",
+        workers=None if reload else int(os.environ.get("WEB_CONCURRENCY", 1)),
+        reload=reload,
         log_level="info"
     ) 
\ No newline at end of file